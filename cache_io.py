@@ -4,32 +4,66 @@ Caching helpers for neighborhoods agglomeration.
 Stores/loads adjacency and initial edge scores, with a lightweight
 metadata key to validate cache correctness.
 
-We use Parquet for data frames and JSON for metadata. No dependency
-on project-specific classes.
+We use Parquet for data frames and JSON for metadata. Adjacency is stored
+in CSR form: one row per tile key with its neighbors as an int32 list of
+row ids (Arrow list offsets/values are the CSR indptr/indices). Edge
+scores refer to tiles by the same int32 row ids, so each key string is
+stored and decoded once. No dependency on project-specific classes.
 """
 from __future__ import annotations
 
 import hashlib
+import itertools
 import json
+import os
+import sys
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Set, Tuple, Optional
+from typing import Dict, Iterable, List, Set, Tuple, Optional
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-ALGO_VERSION = "2025-11-14a"  # bump when adjacency/score logic changes
+try:
+    import xxhash
+except ImportError:  # optional; fall back to stdlib sha256
+    xxhash = None
+
+try:
+    import orjson
+except ImportError:  # optional; fall back to stdlib json
+    orjson = None
+
+ALGO_VERSION = "2026-10-15c"  # bump when adjacency/score logic changes
+
+# In-process memo of tile signatures: id(frame) -> (weakref, probe, signature)
+_TILES_SIG_MEMO: Dict[int, tuple] = {}
+_FINGERPRINT_STORE_MAX = 16  # entries kept in <cache_dir>/fingerprint.json
+
+# Cache files are write-once and always read whole: zstd instead of the default
+# snappy for smaller files, and no column statistics since nothing filters on them
+_PARQUET_WRITE_OPTS = dict(
+    compression="zstd",
+    compression_level=3,
+    write_statistics=False,
+)
 
 
 def _file_fingerprint(path: str) -> dict:
     try:
-        p = Path(path)
-        st = p.stat()
+        # abspath is string-only; the path is just a tag, so symlinks need not be resolved
+        st = os.stat(path)
         return {
-            "path": str(p.resolve()),
+            "path": os.path.abspath(path),
             "size": int(st.st_size),
             "mtime": float(st.st_mtime),
+            "mtime_ns": int(st.st_mtime_ns),
         }
     except Exception:
-        return {"path": path, "size": None, "mtime": None}
+        return {"path": path, "size": None, "mtime": None, "mtime_ns": None}
 
 
 def _tiles_signature(tiles_gdf) -> dict:
@@ -41,15 +75,49 @@ def _tiles_signature(tiles_gdf) -> dict:
             keys = tiles_gdf["key"].astype(str)
         except Exception:
             return {"n_tiles": None, "keys_hash": None}
-    keys_list = list(keys.values if hasattr(keys, "values") else keys)
-    keys_sorted = sorted(keys_list)
-    h = hashlib.sha256("\n".join(keys_sorted).encode("utf-8")).hexdigest()
+    keys_sorted = sorted(keys.tolist())
+    joined = "\n".join(keys_sorted).encode("utf-8")
+    # Non-cryptographic is fine for a cache tag; xxh3 is several times faster
+    if xxhash is not None:
+        h = xxhash.xxh3_128_hexdigest(joined)
+    else:
+        h = hashlib.sha256(joined).hexdigest()
     return {
         "n_tiles": int(len(keys_sorted)),
         "keys_hash": h,
     }
 
 
+def _tiles_probe(tiles_gdf) -> Optional[tuple]:
+    """Cheap stand-in for a tiles frame's contents: (n, first key, last key)."""
+    try:
+        keys = tiles_gdf["tile_key"]
+        if len(keys) == 0:
+            return (0, None, None)
+        return (int(len(keys)), str(keys.iloc[0]), str(keys.iloc[-1]))
+    except Exception:
+        return None
+
+
+def _memo_tiles_signature(tiles_gdf) -> dict:
+    """_tiles_signature memoized per live frame object. The weakref guards
+    against id() reuse; the probe only notices a changed length or first/last
+    key, so other in-place edits to tile_key return the stale signature.
+    """
+    probe = _tiles_probe(tiles_gdf)
+    key = id(tiles_gdf)
+    hit = _TILES_SIG_MEMO.get(key)
+    if hit is not None and hit[0]() is tiles_gdf and hit[1] == probe:
+        return hit[2]
+    sig = _tiles_signature(tiles_gdf)
+    try:
+        ref = weakref.ref(tiles_gdf, lambda _, k=key: _TILES_SIG_MEMO.pop(k, None))
+        _TILES_SIG_MEMO[key] = (ref, probe, sig)
+    except TypeError:
+        pass
+    return sig
+
+
 def make_cache_key(
     parcels_path: str,
     tiles_path: str,
@@ -57,20 +125,58 @@ def make_cache_key(
     crs_epsg_feet: Optional[int],
     k_neighbors: int,
     tiles_after_filter,
+    cache_dir: Optional[str] = None,
 ) -> dict:
+    """Build the metadata used to validate a cache.
+
+    With cache_dir, the tiles signature is also remembered on disk keyed by
+    both input files' path, size and mtime_ns, so unchanged inputs skip
+    hashing every tile key. This assumes tiles_after_filter is derived only
+    from those files and crs_epsg_feet (bump ALGO_VERSION if that derivation
+    changes). Pass cache_dir=None when caching is disabled.
+    """
+    parcels_fp = _file_fingerprint(parcels_path)
+    tiles_fp = parcels_fp if tiles_path == parcels_path else _file_fingerprint(tiles_path)
+    tiles_sig = None
+    store_path = store = store_key = None
+    if cache_dir is not None and parcels_fp["mtime_ns"] is not None and tiles_fp["mtime_ns"] is not None:
+        store_path = Path(cache_dir) / "fingerprint.json"
+        store_key = json.dumps([
+            [fp["path"], fp["size"], fp["mtime_ns"]] for fp in (parcels_fp, tiles_fp)
+        ] + [crs_epsg_feet, _tiles_probe(tiles_after_filter), ALGO_VERSION])
+        try:
+            store = _read_json(str(store_path))
+        except Exception:
+            store = {}
+        tiles_sig = store.get(store_key)
+    if tiles_sig is None:
+        tiles_sig = _memo_tiles_signature(tiles_after_filter)
+        if store is not None and tiles_sig.get("keys_hash") is not None:
+            store[store_key] = tiles_sig
+            store = dict(list(store.items())[-_FINGERPRINT_STORE_MAX:])
+            try:
+                store_path.parent.mkdir(parents=True, exist_ok=True)
+                _write_json(str(store_path), store)
+            except Exception:
+                pass
     return {
-        "parcels": _file_fingerprint(parcels_path),
-        "tiles": _file_fingerprint(tiles_path),
+        "parcels": parcels_fp,
+        "tiles": tiles_fp,
         "params": {
             "buffer_feet": float(buffer_feet),
             "crs_epsg_feet": int(crs_epsg_feet) if crs_epsg_feet is not None else None,
             "k_neighbors": int(k_neighbors),
         },
-        "tiles_sig": _tiles_signature(tiles_after_filter),
+        "tiles_sig": tiles_sig,
         "algo_version": ALGO_VERSION,
     }
 
 
+def edge_key(a: str, b: str) -> Tuple[str, str]:
+    """Key for an undirected edge: the two tile keys as an ordered tuple."""
+    return (a, b) if a < b else (b, a)
+
+
 def cache_paths(cache_dir: str, prefix: str) -> dict:
     d = Path(cache_dir)
     d.mkdir(parents=True, exist_ok=True)
@@ -81,9 +187,52 @@ def cache_paths(cache_dir: str, prefix: str) -> dict:
     }
 
 
+def _adjacency_csr_ids(
+    adjacency: Dict[str, Set[str]],
+    extra_keys: Iterable[str] = (),
+) -> Tuple[List[str], Dict[str, int], np.ndarray, np.ndarray]:
+    """adjacency_to_csr plus the key -> row id dict used to build it.
+    Ids come from a dict lookup on the sorted keys; only ints go through numpy.
+    """
+    key_set = set(adjacency)
+    for nbs in adjacency.values():
+        key_set.update(nbs)
+    key_set.update(extra_keys)
+    keys = sorted(key_set)
+    index = {k: i for i, k in enumerate(keys)}
+    n = len(keys)
+    counts = np.fromiter((len(nbs) for nbs in adjacency.values()), dtype=np.int64, count=len(adjacency))
+    src = np.repeat(np.fromiter((index[k] for k in adjacency), dtype=np.int64, count=len(adjacency)), counts)
+    dst = np.fromiter(
+        (index[b] for nbs in adjacency.values() for b in nbs), dtype=np.int64, count=int(counts.sum())
+    )
+    # Symmetrize and drop self-loops; sorted (src, dst) codes order rows by src, then dst
+    src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+    keep = src != dst
+    code = np.sort(src[keep] * n + dst[keep])
+    code = code[np.concatenate(([True], code[1:] != code[:-1]))] if len(code) else code
+    src, dst = code // max(n, 1), code % max(n, 1)
+    indptr = np.zeros(n + 1, dtype=np.int32)
+    indptr[1:] = np.cumsum(np.bincount(src, minlength=n))
+    return keys, index, indptr, dst.astype(np.int32)
+
+
+def adjacency_to_csr(
+    adjacency: Dict[str, Set[str]],
+    extra_keys: Iterable[str] = (),
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Symmetric CSR form of a dict-of-sets graph.
+    Returns (sorted str keys, int32 indptr of len N+1, int32 neighbor row ids);
+    row i's neighbors are keys[indices[indptr[i]:indptr[i + 1]]], sorted.
+    extra_keys are added to the key dictionary as rows without neighbors.
+    """
+    keys, _, indptr, indices = _adjacency_csr_ids(adjacency, extra_keys)
+    return np.asarray(keys, dtype=str) if keys else np.empty(0, dtype=str), indptr, indices
+
+
 def save_cache(
     adjacency: Dict[str, Set[str]],
-    edge_scores: Dict[frozenset, object],
+    edge_scores: Dict[Tuple[str, str], object],
     meta: dict,
     cache_dir: str = ".cache",
     prefix: str = "init",
@@ -91,25 +240,12 @@ def save_cache(
     paths = cache_paths(cache_dir, prefix)
 
     # Save metadata
-    with open(paths["meta"], "w", encoding="utf-8") as f:
-        json.dump(meta, f)
-
-    # Save adjacency as undirected edge list a<b
-    rows_adj = []
-    for a, nbs in adjacency.items():
-        for b in nbs:
-            a_s = str(a); b_s = str(b)
-            if a_s < b_s:
-                rows_adj.append({"tile_a": a_s, "tile_b": b_s})
-    df_adj = pd.DataFrame(rows_adj)
-    df_adj.to_parquet(paths["adj"])
-
-    # Save edge scores
-    rows_sc = []
+    _write_json(paths["meta"], meta)
+
+    # Gather edge scores first so their tiles are in the shared key dictionary
+    pairs_sc, r2_l, n_obs_l, n_sales_l = [], [], [], []
     for k, es in edge_scores.items():
-        try:
-            a, b = sorted(list(k))  # type: ignore
-        except Exception:
+        if len(k) != 2:
             continue
         # Accept either dataclass-like or dict-like objects
         r2 = getattr(es, "r2", None)
@@ -119,27 +255,70 @@ def save_cache(
             r2 = es.get("r2", 0.0)
             n_obs = es.get("n_obs", 0)
             n_sales = es.get("n_sales", 0)
-        rows_sc.append({
-            "tile_a": str(a),
-            "tile_b": str(b),
-            "r2": float(r2 if r2 is not None else 0.0),
-            "n_obs": int(n_obs if n_obs is not None else 0),
-            "n_sales": int(n_sales if n_sales is not None else 0),
-        })
-    df_sc = pd.DataFrame(rows_sc)
-    df_sc.to_parquet(paths["scores"])
+        pairs_sc.append(tuple(k))
+        r2_l.append(r2 if r2 is not None else 0.0)
+        n_obs_l.append(n_obs if n_obs is not None else 0)
+        n_sales_l.append(n_sales if n_sales is not None else 0)
+
+    # Save adjacency as CSR: tile_key row i has neighbors tile_key[neighbors[i]].
+    # Tiles known only from edge scores get a null neighbors entry, so they are
+    # in the key dictionary without becoming graph nodes on load.
+    keys, index, indptr, indices = _adjacency_csr_ids(adjacency, extra_keys=itertools.chain.from_iterable(pairs_sc))
+    is_node = np.zeros(len(keys), dtype=bool)
+    is_node[np.fromiter((index[k] for k in adjacency), dtype=np.int64, count=len(adjacency))] = True
+    tbl_adj = pa.table({
+        "tile_key": pa.array(keys, type=pa.string()),
+        "neighbors": pa.ListArray.from_arrays(pa.array(indptr), pa.array(indices), mask=pa.array(~is_node)),
+    })
+    pq.write_table(tbl_adj, paths["adj"], **_PARQUET_WRITE_OPTS)
+
+    # Save edge scores keyed by tile row ids, a<b
+    ai = np.fromiter((index[a] for a, _ in pairs_sc), dtype=np.int32, count=len(pairs_sc))
+    bi = np.fromiter((index[b] for _, b in pairs_sc), dtype=np.int32, count=len(pairs_sc))
+    tbl_sc = pa.table({
+        "tile_a_id": np.minimum(ai, bi),
+        "tile_b_id": np.maximum(ai, bi),
+        "r2": np.asarray(r2_l, dtype=np.float64),
+        "n_obs": np.asarray(n_obs_l, dtype=np.int64),
+        "n_sales": np.asarray(n_sales_l, dtype=np.int64),
+    })
+    pq.write_table(tbl_sc, paths["scores"], **_PARQUET_WRITE_OPTS)
+
+
+def _read_parquet_mmap(path: str) -> pd.DataFrame:
+    """Read a cache file through a memory map, keeping columns Arrow-backed so
+    tile keys are not materialized as Python strings until they are used.
+    """
+    tbl = pq.read_table(path, memory_map=True, use_threads=True)
+    return tbl.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _read_json(path: str) -> dict:
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, obj: dict) -> None:
+    if orjson is not None:
+        Path(path).write_bytes(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
 
 
 def load_cache(cache_dir: str = ".cache", prefix: str = "init") -> Tuple[Optional[dict], Optional[pd.DataFrame], Optional[pd.DataFrame]]:
     paths = cache_paths(cache_dir, prefix)
     try:
-        meta = None
-        meta_path = Path(paths["meta"]) 
-        if meta_path.exists():
-            with open(meta_path, "r", encoding="utf-8") as f:
-                meta = json.load(f)
-        df_adj = pd.read_parquet(paths["adj"]) if Path(paths["adj"]).exists() else None
-        df_scores = pd.read_parquet(paths["scores"]) if Path(paths["scores"]).exists() else None
+        # pyarrow releases the GIL while decoding, so the files load concurrently
+        with ThreadPoolExecutor(max_workers=3) as ex:
+            f_meta = ex.submit(_read_json, paths["meta"]) if Path(paths["meta"]).exists() else None
+            f_adj = ex.submit(_read_parquet_mmap, paths["adj"]) if Path(paths["adj"]).exists() else None
+            f_sc = ex.submit(_read_parquet_mmap, paths["scores"]) if Path(paths["scores"]).exists() else None
+            meta = f_meta.result() if f_meta is not None else None
+            df_adj = f_adj.result() if f_adj is not None else None
+            df_scores = f_sc.result() if f_sc is not None else None
         return meta, df_adj, df_scores
     except Exception:
         return None, None, None
@@ -160,29 +339,52 @@ def cache_valid(cached_meta: dict, current_meta: dict) -> bool:
         return False
 
 
+def _interned_keys(df_adj: pd.DataFrame) -> np.ndarray:
+    """Tile keys of the adjacency table as interned strs (object array).
+    Row ids in both cache tables index into it, so every decoded reference
+    to a tile shares one string object.
+    """
+    return np.array([sys.intern(k) for k in df_adj["tile_key"].astype(str).tolist()], dtype=object)
+
+
 def df_to_adjacency(df_adj: pd.DataFrame) -> Dict[str, Set[str]]:
+    """Decode the adjacency table to dict-of-sets. Rows with null neighbors
+    only name tiles referenced by edge scores and are not graph nodes.
+    """
     adj: Dict[str, Set[str]] = {}
     if df_adj is None or len(df_adj) == 0:
         return adj
-    for _, row in df_adj.iterrows():
-        a = str(row["tile_a"]) ; b = str(row["tile_b"])
-        adj.setdefault(a, set()).add(b)
-        adj.setdefault(b, set()).add(a)
+    keys = _interned_keys(df_adj)
+    nbs = pa.array(df_adj["neighbors"])
+    if isinstance(nbs, pa.ChunkedArray):
+        nbs = nbs.combine_chunks()
+    offsets = nbs.offsets.to_numpy()
+    indptr = offsets - offsets[0]
+    indices = nbs.flatten().to_numpy()
+    is_node = nbs.is_valid().to_numpy(zero_copy_only=False)
+    for i, k in enumerate(keys.tolist()):
+        if is_node[i]:
+            adj[k] = set(keys[indices[indptr[i]:indptr[i + 1]]].tolist())
     return adj
 
 
-def df_to_edge_scores(df_scores: pd.DataFrame):
-    out: Dict[frozenset, dict] = {}
-    if df_scores is None or len(df_scores) == 0:
+def df_to_edge_scores(df_scores: pd.DataFrame, df_adj: pd.DataFrame):
+    """Decode edge scores keyed by edge_key(); tile ids are rows of df_adj's
+    tile_key column, sorted, so a < b already holds for every row.
+    """
+    out: Dict[Tuple[str, str], dict] = {}
+    if df_scores is None or len(df_scores) == 0 or df_adj is None or len(df_adj) == 0:
         return out
-    for _, row in df_scores.iterrows():
-        a = str(row.get("tile_a"))
-        b = str(row.get("tile_b"))
+    n = len(df_scores)
+    cols = df_scores.columns
+    keys = _interned_keys(df_adj)
+    ta = keys[df_scores["tile_a_id"].to_numpy(dtype=np.int64)]
+    tb = keys[df_scores["tile_b_id"].to_numpy(dtype=np.int64)]
+    r2 = df_scores["r2"].to_numpy(dtype=np.float64) if "r2" in cols else np.zeros(n)
+    no = df_scores["n_obs"].to_numpy(dtype=np.int64) if "n_obs" in cols else np.zeros(n, dtype=np.int64)
+    ns = df_scores["n_sales"].to_numpy(dtype=np.int64) if "n_sales" in cols else np.zeros(n, dtype=np.int64)
+    for a, b, r, o, s in zip(ta.tolist(), tb.tolist(), r2.tolist(), no.tolist(), ns.tolist()):
         if not a or not b:
             continue
-        out[frozenset([a, b])] = {
-            "r2": float(row.get("r2", 0.0)),
-            "n_obs": int(row.get("n_obs", 0)),
-            "n_sales": int(row.get("n_sales", 0)),
-        }
+        out[(a, b)] = {"r2": r, "n_obs": o, "n_sales": s}
     return out
@@ -2,24 +2,43 @@
 Multiprocessing helpers for neighborhoods agglomeration.
 
 These functions are defined in a regular Python module so that Windows
-multiprocessing (spawn) can import them in child processes.
+multiprocessing (spawn) can import them in child processes. The vectorized
+batch edge scorer lives here too since it shares the workers' data layout.
 """
 from __future__ import annotations
 
-from typing import Dict, Set, Tuple, Optional, List
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterator, Set, Sequence, Tuple, Optional, List
 
 import numpy as np
 import pandas as pd
 
+from utilities import ols_r2_2pred, r2_2pred_segments
+
+try:
+    from numba import njit, prange
+except ImportError:  # optional; score_edges_batch falls back to numpy segment sums
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
 # ---------------------------
 # Globals shared in workers
 # ---------------------------
 # For adjacency: list of buffered geometries (Shapely geometries)
 _BUFFERED_GEOMS: Optional[List[object]] = None
 
-# For edge scoring: slim parcels dataframe and tile->parcel index mapping
-_PARCELS_MIN_DF: Optional[pd.DataFrame] = None
-_PARCEL_IDX_BY_TILE: Optional[Dict[str, Set[int]]] = None
+# For edge scoring: per-parcel column arrays (positional) and tile->parcel rows as CSR
+_MVP: Optional[np.ndarray] = None
+_BUILT: Optional[np.ndarray] = None
+_LAND: Optional[np.ndarray] = None
+_SALE_MASK: Optional[np.ndarray] = None
+_VALID: Optional[np.ndarray] = None  # proxy, built and land all finite
+_TILE_ROW: Optional[Dict[str, int]] = None
+_TILE_INDPTR: Optional[np.ndarray] = None
+_TILE_PARCELS: Optional[np.ndarray] = None
+# Shared memory blocks attached by this worker; kept open for the arrays above
+_SHM_HANDLES: List[SharedMemory] = []
 
 
 # ---------------------------
@@ -34,13 +53,246 @@ def _init_pool_buffered(geoms_list: List[object]):
     _BUFFERED_GEOMS = geoms_list
 
 
-def _init_pool_edges(parcels_min_df: pd.DataFrame, parcel_idx_by_tile: Dict[str, Set[int]]):
+def edge_arrays(parcels_min_df: pd.DataFrame, parcel_idx_by_tile: Dict[str, Set[int]]):
+    """Split the slim parcels frame into the column arrays expected by
+    _init_pool_edges. Parcel indices are index labels of parcels_min_df and
+    are translated to row positions. Missing value columns become all-NaN
+    so affected edges score 0.
+    """
+    n = len(parcels_min_df)
+    index = parcels_min_df.index
+    positional = isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1
+
+    def _rows(labels: Set[int]) -> np.ndarray:
+        arr = np.fromiter(labels, dtype=np.int64, count=len(labels))
+        if positional:
+            return arr
+        pos = index.get_indexer(arr)
+        return pos[pos >= 0].astype(np.int64)
+
+    def _col(name: str) -> np.ndarray:
+        if name in parcels_min_df.columns:
+            return parcels_min_df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.full(n, np.nan)
+
+    if "adj_sale_price" in parcels_min_df.columns:
+        sale_mask = parcels_min_df["adj_sale_price"].notna().to_numpy()
+    else:
+        sale_mask = np.zeros(n, dtype=bool)
+    idx_by_tile = {k: _rows(v) for k, v in parcel_idx_by_tile.items()}
+    return _col("market_value_proxy"), _col("built_area_sqft"), _col("land_area_sqft"), sale_mask, idx_by_tile
+
+
+def _tile_csr(idx_by_tile: Dict[str, np.ndarray]) -> Tuple[Dict[str, int], np.ndarray, np.ndarray]:
+    """Pack tile -> parcel rows as CSR.
+    Returns (tile -> row id, int32 indptr, int32 parcel rows sorted within each tile).
+    """
+    tile_row: Dict[str, int] = {}
+    chunks = []
+    for k, v in idx_by_tile.items():
+        tile_row[k] = len(chunks)
+        chunks.append(np.unique(v))
+    indptr = np.zeros(len(chunks) + 1, dtype=np.int32)
+    indptr[1:] = np.cumsum([len(c) for c in chunks])
+    parcels = np.concatenate(chunks).astype(np.int32) if chunks else np.empty(0, dtype=np.int32)
+    return tile_row, indptr, parcels
+
+
+def _set_edge_globals(mvp, built, land, sale_mask, tile_row, indptr, parcels):
+    global _MVP, _BUILT, _LAND, _SALE_MASK, _VALID, _TILE_ROW, _TILE_INDPTR, _TILE_PARCELS
+    _MVP = mvp
+    _BUILT = built
+    _LAND = land
+    _SALE_MASK = sale_mask
+    # Row validity is per parcel, so it is computed once here rather than per edge
+    _VALID = np.isfinite(mvp) & np.isfinite(built) & np.isfinite(land)
+    _TILE_ROW = tile_row
+    _TILE_INDPTR = indptr
+    _TILE_PARCELS = parcels
+
+
+def _init_pool_edges(
+    mvp: np.ndarray,
+    built: np.ndarray,
+    land: np.ndarray,
+    sale_mask: np.ndarray,
+    idx_by_tile: Dict[str, np.ndarray],
+):
     """Initializer for multiprocessing pool for edge scoring.
     Stores minimal read-only data in module globals for workers.
     """
-    global _PARCELS_MIN_DF, _PARCEL_IDX_BY_TILE
-    _PARCELS_MIN_DF = parcels_min_df
-    _PARCEL_IDX_BY_TILE = parcel_idx_by_tile
+    _set_edge_globals(mvp, built, land, sale_mask, *_tile_csr(idx_by_tile))
+
+
+def share_edge_arrays(
+    mvp: np.ndarray,
+    built: np.ndarray,
+    land: np.ndarray,
+    sale_mask: np.ndarray,
+    idx_by_tile: Dict[str, np.ndarray],
+) -> Tuple[tuple, List[SharedMemory]]:
+    """Copy the edge-scoring arrays into shared memory blocks (parent side).
+    Returns (initargs for _init_pool_edges_shared, handles). Workers attach by
+    name instead of unpickling their own copy; pass the handles to
+    release_shared() once the pool is done.
+    """
+    tile_row, indptr, parcels = _tile_csr(idx_by_tile)
+    specs: Dict[str, tuple] = {}
+    handles: List[SharedMemory] = []
+    try:
+        for name, arr in (
+            ("mvp", mvp), ("built", built), ("land", land), ("sale_mask", sale_mask),
+            ("indptr", indptr), ("parcels", parcels),
+        ):
+            arr = np.ascontiguousarray(arr)
+            shm = SharedMemory(create=True, size=max(arr.nbytes, 1))
+            handles.append(shm)
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+            specs[name] = (shm.name, arr.shape, arr.dtype.str)
+    except Exception:
+        release_shared(handles)
+        raise
+    return (specs, tile_row), handles
+
+
+def release_shared(handles: List[SharedMemory]) -> None:
+    """Close and unlink shared memory blocks created by share_edge_arrays."""
+    for shm in handles:
+        try:
+            shm.close()
+            shm.unlink()
+        except Exception:
+            pass
+
+
+def _init_pool_edges_shared(specs: Dict[str, tuple], tile_row: Dict[str, int]):
+    """Pool initializer attaching to the blocks made by share_edge_arrays.
+    Arrays are zero-copy views, treated as read-only by worker processes.
+    """
+    arrays = {}
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = SharedMemory(name=shm_name)
+        _SHM_HANDLES.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    _set_edge_globals(
+        arrays["mvp"], arrays["built"], arrays["land"], arrays["sale_mask"],
+        tile_row, arrays["indptr"], arrays["parcels"],
+    )
+
+
+# ---------------------------
+# OLS kernels
+# ---------------------------
+
+def score_edges_batch(
+    pairs: List[Tuple[str, str]],
+    mvp: np.ndarray,
+    built: np.ndarray,
+    land: np.ndarray,
+    sale_mask: np.ndarray,
+    idx_by_tile: Dict[str, np.ndarray],
+    block_size: int = 65536,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Score many tile pairs at once; same results as _score_edge_pair_worker.
+    Arrays are those returned by edge_arrays(). Each edge's parcels form one
+    segment, regressed with utilities.r2_2pred_segments, so there is no
+    per-edge numpy or lstsq call. With numba installed a parallel JIT kernel
+    runs ols_r2_2pred per edge instead, using all cores without a process pool.
+    Returns (r2, n_obs, n_sales) arrays aligned with pairs.
+    """
+    r2 = np.zeros(len(pairs), dtype=np.float64)
+    n_obs = np.zeros(len(pairs), dtype=np.int64)
+    n_sales = np.zeros(len(pairs), dtype=np.int64)
+    valid = np.isfinite(mvp) & np.isfinite(built) & np.isfinite(land)
+    empty = np.empty(0, dtype=np.int64)
+    if _score_edges_kernel is not None:
+        # The kernel merges both tiles' sorted CSR rows per edge
+        tile_row, tile_offsets, tile_parcels = _tile_csr(idx_by_tile)
+        ea = np.fromiter((tile_row.get(a, -1) for a, _ in pairs), dtype=np.int64, count=len(pairs))
+        eb = np.fromiter((tile_row.get(c, -1) for _, c in pairs), dtype=np.int64, count=len(pairs))
+        _score_edges_kernel(ea, eb, tile_offsets, tile_parcels, mvp, built, land, valid, sale_mask, r2, n_obs, n_sales)
+        return r2, n_obs, n_sales
+    for start in range(0, len(pairs), block_size):
+        block = pairs[start:start + block_size]
+        parts = []
+        for a, c in block:
+            parts.append(idx_by_tile.get(a, empty))
+            parts.append(idx_by_tile.get(c, empty))
+        lengths = np.fromiter((len(p) for p in parts), dtype=np.int64, count=len(parts))
+        parcel_ids = np.concatenate(parts) if parts else empty
+        pair_ids = np.repeat(np.arange(len(parts), dtype=np.int64) // 2, lengths)
+        # Drop parcels that sit in both tiles of an edge
+        order = np.lexsort((parcel_ids, pair_ids))
+        pair_ids = pair_ids[order]
+        parcel_ids = parcel_ids[order]
+        keep = np.ones(len(pair_ids), dtype=bool)
+        keep[1:] = (pair_ids[1:] != pair_ids[:-1]) | (parcel_ids[1:] != parcel_ids[:-1])
+        pair_ids = pair_ids[keep]
+        parcel_ids = parcel_ids[keep]
+
+        m = len(block)
+        n_all = np.bincount(pair_ids, minlength=m)
+        sales = np.bincount(pair_ids, weights=sale_mask[parcel_ids], minlength=m).astype(np.int64)
+        v = valid[parcel_ids]
+        pv = pair_ids[v]
+        rows = parcel_ids[v]
+        n = np.bincount(pv, minlength=m)
+        r2_blk = r2_2pred_segments(pv, m, mvp[rows], built[rows], land[rows])
+
+        scored = (sales >= 3) & (n >= 3)
+        r2[start:start + m] = np.where(scored, r2_blk, 0.0)
+        n_obs[start:start + m] = np.where(scored, n.astype(np.int64), n_all)
+        n_sales[start:start + m] = sales
+    return r2, n_obs, n_sales
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _score_edges_kernel(ea, eb, tile_offsets, tile_parcels, y, b, l, valid, sale_mask,
+                            r2_out, nobs_out, nsales_out):
+        """Per-edge parcel merge and 2-predictor R^2, parallel over edges.
+        Mirrors the numpy path of score_edges_batch.
+        """
+        for e in prange(ea.shape[0]):
+            i = i_end = j = j_end = 0
+            if ea[e] >= 0:
+                i = tile_offsets[ea[e]]
+                i_end = tile_offsets[ea[e] + 1]
+            if eb[e] >= 0:
+                j = tile_offsets[eb[e]]
+                j_end = tile_offsets[eb[e] + 1]
+            rows = np.empty((i_end - i) + (j_end - j), dtype=np.int64)
+            n_all = 0
+            n_sales = 0
+            n = 0
+            while i < i_end or j < j_end:
+                # Merge the two sorted row lists, counting shared parcels once
+                if j >= j_end or (i < i_end and tile_parcels[i] < tile_parcels[j]):
+                    p = tile_parcels[i]
+                    i += 1
+                elif i >= i_end or tile_parcels[j] < tile_parcels[i]:
+                    p = tile_parcels[j]
+                    j += 1
+                else:
+                    p = tile_parcels[i]
+                    i += 1
+                    j += 1
+                n_all += 1
+                if sale_mask[p]:
+                    n_sales += 1
+                if valid[p]:
+                    rows[n] = p
+                    n += 1
+            nsales_out[e] = n_sales
+            if n_sales < 3 or n < 3:
+                r2_out[e] = 0.0
+                nobs_out[e] = n_all
+                continue
+            nobs_out[e] = n
+            sel = rows[:n]
+            r2_out[e] = ols_r2_2pred(y[sel], b[sel], l[sel])
+else:
+    _score_edges_kernel = None
 
 
 # ---------------------------
@@ -53,8 +305,11 @@ def _pair_overlaps_area(pair: Tuple[int, int]) -> Optional[Tuple[int, int]]:
     """
     try:
         i, j = pair
-        inter = _BUFFERED_GEOMS[i].intersection(_BUFFERED_GEOMS[j])  # type: ignore[index]
-        if getattr(inter, "area", 0.0) > 0:
+        gi = _BUFFERED_GEOMS[i]  # type: ignore[index]
+        gj = _BUFFERED_GEOMS[j]  # type: ignore[index]
+        # For polygons the interiors meet (positive-area overlap) iff they
+        # intersect but do not merely touch; no intersection geometry is built
+        if gi.intersects(gj) and not gi.touches(gj):
             return (i, j)
         return None
     except Exception:
@@ -67,37 +322,23 @@ def _score_edge_pair_worker(pair: Tuple[str, str]) -> Tuple[str, str, float, int
     """
     try:
         a, b = pair
-        mapping = _PARCEL_IDX_BY_TILE or {}
-        idxs = list((mapping.get(a, set()) or set()) | (mapping.get(b, set()) or set()))
+        rows = [r for r in ((_TILE_ROW or {}).get(a), (_TILE_ROW or {}).get(b)) if r is not None]
+        parts = [_TILE_PARCELS[_TILE_INDPTR[r]:_TILE_INDPTR[r + 1]] for r in rows]
+        idxs = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
         if len(idxs) == 0:
             return a, b, 0.0, 0, 0
-        sub = _PARCELS_MIN_DF.iloc[idxs]
-        n_sales = int(sub["adj_sale_price"].notna().sum()) if "adj_sale_price" in sub.columns else 0
+        n_sales = int(_SALE_MASK[idxs].sum())
         if n_sales < 3:
-            return a, b, 0.0, int(len(sub)), n_sales
-        cols = ["market_value_proxy", "built_area_sqft", "land_area_sqft"]
-        if not all(c in sub.columns for c in cols):
-            return a, b, 0.0, int(len(sub)), n_sales
-        df = sub[cols].astype(float).dropna()
-        if len(df) < 3:
-            return a, b, 0.0, int(len(sub)), n_sales
-        y = df["market_value_proxy"].values
-        X = df[["built_area_sqft", "land_area_sqft"]].values
-        # Compute OLS R^2 with intercept
-        X_ = np.column_stack([np.ones(len(X)), X])
+            return a, b, 0.0, int(len(idxs)), n_sales
+        sel = idxs[_VALID[idxs]]
+        n_obs = int(len(sel))
+        if n_obs < 3:
+            return a, b, 0.0, int(len(idxs)), n_sales
         try:
-            beta, residuals, rank, s = np.linalg.lstsq(X_, y, rcond=None)
-            yhat = X_.dot(beta)
-            ss_res = float(np.sum((y - yhat) ** 2))
-            ss_tot = float(np.sum((y - y.mean()) ** 2))
-            r2 = 0.0 if ss_tot <= 0 else 1.0 - (ss_res / ss_tot)
+            r2 = float(ols_r2_2pred(_MVP[sel], _BUILT[sel], _LAND[sel]))
         except Exception:
             r2 = 0.0
-        if not np.isfinite(r2):
-            r2 = 0.0
-        # Clamp r2
-        r2 = float(max(min(r2, 1.0), -1.0))
-        return a, b, r2, int(len(df)), n_sales
+        return a, b, r2, n_obs, n_sales
     except Exception:
         # On any error, return safe defaults so the main process can continue
         try:
@@ -105,3 +346,15 @@ def _score_edge_pair_worker(pair: Tuple[str, str]) -> Tuple[str, str, float, int
         except Exception:
             a = b = ""
         return a, b, 0.0, 0, 0
+
+
+def score_edges_chunk(pairs: List[Tuple[str, str]]) -> List[Tuple[str, str, float, int, int]]:
+    """Score a chunk of edges in one pool task so IPC is paid per chunk, not per pair."""
+    return [_score_edge_pair_worker(p) for p in pairs]
+
+
+def chunks_of(items: Sequence, size: int) -> Iterator[Sequence]:
+    """Yield consecutive slices of at most `size` items."""
+    size = max(1, int(size))
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
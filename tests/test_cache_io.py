@@ -0,0 +1,44 @@
+import json
+import os
+
+import pandas as pd
+
+import cache_io
+
+
+def _inputs(tmp_path):
+    parcels = tmp_path / "parcels.parquet"
+    tiles = tmp_path / "tiles.parquet"
+    parcels.write_bytes(b"p")
+    tiles.write_bytes(b"t")
+    frame = pd.DataFrame({"tile_key": [f"t{i}" for i in range(10)]})
+    return str(parcels), str(tiles), frame
+
+
+def test_fingerprint_store_keyed_by_mtime_ns(tmp_path):
+    parcels, tiles, frame = _inputs(tmp_path)
+    cache_dir = tmp_path / "cache"
+    meta = cache_io.make_cache_key(parcels, tiles, 30.0, 2236, 3, frame, cache_dir=str(cache_dir))
+    store = json.loads((cache_dir / "fingerprint.json").read_text())
+    (key,) = store
+    assert json.loads(key)[0] == [os.path.abspath(parcels), 1, os.stat(parcels).st_mtime_ns]
+    assert store[key] == meta["tiles_sig"]
+
+
+def test_no_fingerprint_store_without_cache_dir(tmp_path):
+    parcels, tiles, frame = _inputs(tmp_path)
+    meta = cache_io.make_cache_key(parcels, tiles, 30.0, 2236, 3, frame, cache_dir=None)
+    assert meta["tiles_sig"]["n_tiles"] == 10
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["parcels.parquet", "tiles.parquet"]
+
+
+def test_cache_round_trip_keeps_score_only_tiles_out_of_adjacency(tmp_path):
+    adjacency = {"a": {"b"}, "b": {"a", "c"}, "c": {"b"}, "x": set()}
+    edge_scores = {
+        ("a", "b"): {"r2": 0.5, "n_obs": 10, "n_sales": 4},
+        ("q", "r"): {"r2": 0.25, "n_obs": 7, "n_sales": 3},
+    }
+    cache_io.save_cache(adjacency, edge_scores, {"algo_version": cache_io.ALGO_VERSION}, cache_dir=str(tmp_path))
+    _, df_adj, df_scores = cache_io.load_cache(cache_dir=str(tmp_path))
+    assert cache_io.df_to_adjacency(df_adj) == adjacency
+    assert cache_io.df_to_edge_scores(df_scores, df_adj) == edge_scores
@@ -0,0 +1,112 @@
+"""The edge scorers (pool worker, batch scorer with and without numba) and
+utilities.ols_r2 must agree with a plain lstsq fit on [1, built, land],
+including degenerate and near-collinear predictors.
+"""
+import multiprocessing as mp
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import mp_helpers
+from utilities import ols_r2
+
+MODES = ["random", "const_land", "const_built", "collinear", "near_collinear", "nearer_collinear"]
+
+
+def _fixture(mode, seed=0, n=600, n_tiles=40):
+    rng = np.random.default_rng(seed)
+    built = rng.uniform(500, 4000, n)
+    land = rng.uniform(2000, 20000, n)
+    if mode == "const_land":
+        land[:] = 7500.0
+    elif mode == "const_built":
+        built[:] = 1234.5
+    elif mode == "collinear":
+        land = 2 * built
+    elif mode == "near_collinear":
+        # Full rank, but far inside what the normal-equation determinant resolves
+        land = 2 * built + rng.normal(0, 1e-3, n)
+    elif mode == "nearer_collinear":
+        land = 2 * built + rng.normal(0, 1e-6, n)
+    mvp = 100 * built + 5 * land + rng.normal(0, 5e4, n)
+    sale = np.where(rng.random(n) < 0.6, mvp, np.nan)
+    mvp[rng.random(n) < 0.05] = np.nan
+    parcels = pd.DataFrame({
+        "market_value_proxy": mvp,
+        "built_area_sqft": built,
+        "land_area_sqft": land,
+        "adj_sale_price": sale,
+    })
+    tiles = {
+        f"t{i}": set(rng.choice(n, rng.integers(2, 30), replace=False).tolist())
+        for i in range(n_tiles)
+    }
+    keys = sorted(tiles)
+    pairs = [
+        (keys[i], keys[j])
+        for i in range(n_tiles) for j in range(i + 1, n_tiles)
+        if rng.random() < 0.3
+    ]
+    return parcels, tiles, pairs
+
+
+def _lstsq_r2(y, X):
+    # The original ols_r2: lstsq on the design matrix with an intercept column
+    X_ = np.column_stack([np.ones(len(X)), X])
+    beta = np.linalg.lstsq(X_, y, rcond=None)[0]
+    ss_res = np.sum((y - X_ @ beta) ** 2)
+    ss_tot = np.sum((y - y.mean()) ** 2)
+    if ss_tot <= 0:
+        return 0.0
+    return float(max(min(1.0 - ss_res / ss_tot, 1.0), -1.0))
+
+
+def _subsets(parcels, tiles, pairs):
+    # Same row selection as the notebook's score_edge; None where it scores 0
+    for a, b in pairs:
+        sub = parcels.loc[sorted(tiles[a] | tiles[b])]
+        n_sales = int(sub["adj_sale_price"].notna().sum())
+        df = sub[["market_value_proxy", "built_area_sqft", "land_area_sqft"]].dropna()
+        if n_sales < 3 or len(df) < 3:
+            yield None
+        else:
+            yield df["market_value_proxy"].values, df[["built_area_sqft", "land_area_sqft"]].values
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_scorers_match_lstsq(mode, monkeypatch):
+    parcels, tiles, pairs = _fixture(mode)
+    subsets = list(_subsets(parcels, tiles, pairs))
+    expected = np.array([0.0 if s is None else _lstsq_r2(*s) for s in subsets])
+    assert np.count_nonzero(expected) > len(pairs) // 2
+
+    direct = np.array([0.0 if s is None else ols_r2(*s) for s in subsets])
+    np.testing.assert_allclose(direct, expected, rtol=1e-7, atol=1e-9)
+
+    arrays = mp_helpers.edge_arrays(parcels, tiles)
+    mp_helpers._init_pool_edges(*arrays)
+    worker = np.array([mp_helpers._score_edge_pair_worker(p)[2] for p in pairs])
+    np.testing.assert_allclose(worker, expected, rtol=1e-7, atol=1e-9)
+
+    batch = mp_helpers.score_edges_batch(pairs, *arrays)[0]
+    np.testing.assert_allclose(batch, expected, rtol=1e-7, atol=1e-9)
+
+    monkeypatch.setattr(mp_helpers, "_score_edges_kernel", None)
+    batch_numpy = mp_helpers.score_edges_batch(pairs, *arrays)[0]
+    np.testing.assert_allclose(batch_numpy, expected, rtol=1e-7, atol=1e-9)
+
+
+def test_shared_pool_matches_batch_on_constant_predictor():
+    parcels, tiles, pairs = _fixture("const_land")
+    arrays = mp_helpers.edge_arrays(parcels, tiles)
+    expected = dict(zip(pairs, mp_helpers.score_edges_batch(pairs, *arrays)[0]))
+    initargs, handles = mp_helpers.share_edge_arrays(*arrays)
+    try:
+        with mp.get_context("spawn").Pool(2, initializer=mp_helpers._init_pool_edges_shared, initargs=initargs) as pool:
+            results = list(pool.imap_unordered(mp_helpers._score_edge_pair_worker, pairs, chunksize=32))
+    finally:
+        mp_helpers.release_shared(handles)
+    assert len(results) == len(pairs)
+    for a, b, r2, _, _ in results:
+        assert r2 == pytest.approx(expected[(a, b)], rel=1e-7, abs=1e-9)
@@ -0,0 +1,20 @@
+import warnings
+
+import geopandas as gpd
+from shapely.geometry import Point
+
+from utilities import ensure_feet_crs
+
+
+def test_ensure_feet_crs_invalid_epsg_warns_and_keeps_crs():
+    gdf = gpd.GeoDataFrame(geometry=[Point(0, 0)], crs=4326)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        out = ensure_feet_crs(gdf, 999999)
+    assert out.crs.to_epsg() == 4326
+    assert any("Failed to reproject" in str(w.message) for w in caught)
+
+
+def test_ensure_feet_crs_same_crs_is_noop():
+    gdf = gpd.GeoDataFrame(geometry=[Point(0, 0)], crs=2236)
+    assert ensure_feet_crs(gdf, 2236) is gdf
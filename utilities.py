@@ -1,9 +1,16 @@
+import math
 import warnings
 import geopandas as gpd
 import pandas as pd
 import numpy as np
+from pyproj import CRS
 from typing import Optional
 
+try:
+    from numba import njit
+except ImportError:  # optional; ols_r2_2pred falls back to numpy moments
+    njit = None
+
 def ensure_feet_crs(gdf: gpd.GeoDataFrame, target_epsg: Optional[int]) -> gpd.GeoDataFrame:
     if gdf.crs is None:
         warnings.warn("Input GeoDataFrame has no CRS; proceeding without reprojection. Distances may be incorrect.")
@@ -11,9 +18,11 @@ def ensure_feet_crs(gdf: gpd.GeoDataFrame, target_epsg: Optional[int]) -> gpd.Ge
     if target_epsg is None:
         # Try to infer unit; many commonly used projected CRSs are in meters. If meters, we convert feet->meters when buffering later.
         return gdf
-    # if gdf.crs.to_epsg() == target_epsg:
-    #     return gdf
     try:
+        # Already there: skip reprojecting every vertex. to_epsg() can be None for
+        # CRSs without an exact EPSG match, so also compare the definitions.
+        if gdf.crs.to_epsg() == target_epsg or gdf.crs.equals(CRS.from_epsg(target_epsg)):
+            return gdf
         return gdf.to_crs(epsg=target_epsg)
     except Exception as e:
         warnings.warn(f"Failed to reproject to EPSG:{target_epsg}: {e}. Proceeding in original CRS.")
@@ -29,29 +38,153 @@ def compute_market_value_proxy(
     if sale is None or sale.isna().all():
         proxy = assessed.astype(float)
     else:
-        sale = sale.astype(float)
-        assessed = assessed.astype(float)
-        both = (~sale.isna()) & (~assessed.isna())
-        proxy = assessed.copy().astype(float)
-        proxy[both] = (sale[both] + assessed[both]) / 2.0
+        s = sale.to_numpy(dtype=np.float64, na_value=np.nan)
+        a = assessed.to_numpy(dtype=np.float64, na_value=np.nan)
         # where sale is nan, keep assessed; where assessed is nan but sale exists, use sale
-        only_sale = (~sale.isna()) & (assessed.isna())
-        proxy[only_sale] = sale[only_sale]
+        values = np.where(np.isnan(s), a, np.where(np.isnan(a), s, 0.5 * (s + a)))
+        proxy = pd.Series(values, index=parcels.index, name=assessed.name)
     return proxy
 
-def ols_r2(y: np.ndarray, X: np.ndarray) -> float:
-    # Add intercept
-    X_ = np.column_stack([np.ones(len(X)), X])
-    try:
-        beta, residuals, rank, s = np.linalg.lstsq(X_, y, rcond=None)
-    except np.linalg.LinAlgError:
+# Relative norm below which the second predictor's residual (what is left after
+# projecting out the first) is rounding noise, so the design counts as rank 1
+_RANK_RTOL = 3e-14
+
+def _r2_from_moments(spp, spy, soo, srr, sry, syy):
+    """R^2 of y ~ 1 + x1 + x2 after one Gram-Schmidt step on centered data.
+    p is the predictor with the larger spread and o the other one; r is o
+    minus its projection on p, formed row by row so near-collinear designs
+    keep the precision lstsq has (the normal-equation determinant loses it).
+    spp, soo, srr, syy are sums of squares; spy, sry are cross-products
+    with y. A residual at rounding level, or a constant p, falls back to
+    the span still covered, as lstsq reports for rank-deficient designs.
+    Non-finite results score 0; the rest is clamped to [-1, 1]. This is
+    the single 2-predictor kernel: ols_r2 and the mp_helpers edge scorers
+    all go through it.
+    """
+    if not syy > 0:
+        return 0.0
+    ss_reg = 0.0
+    if spp > 0:
+        ss_reg = spy * spy / spp
+        if srr > _RANK_RTOL * _RANK_RTOL * soo:
+            ss_reg += sry * sry / srr
+    r2 = ss_reg / syy
+    if not math.isfinite(r2):
         return 0.0
-    yhat = X_.dot(beta)
-    ss_res = np.sum((y - yhat) ** 2)
-    ss_tot = np.sum((y - y.mean()) ** 2)
+    return min(max(r2, -1.0), 1.0)
+
+def _ols_r2_2pred_loops(y, x1, x2):
+    # Three sweeps: means, centered moments, then the residual of the
+    # smaller-spread predictor against the larger one
+    n = y.shape[0]
+    my = 0.0
+    m1 = 0.0
+    m2 = 0.0
+    for i in range(n):
+        my += y[i]
+        m1 += x1[i]
+        m2 += x2[i]
+    my /= n
+    m1 /= n
+    m2 /= n
+    s11 = s22 = s12 = s1y = s2y = syy = 0.0
+    for i in range(n):
+        dy = y[i] - my
+        d1 = x1[i] - m1
+        d2 = x2[i] - m2
+        s11 += d1 * d1
+        s22 += d2 * d2
+        s12 += d1 * d2
+        s1y += d1 * dy
+        s2y += d2 * dy
+        syy += dy * dy
+    if s11 >= s22:
+        xp, xo, mp, mo, spp, soo, spy = x1, x2, m1, m2, s11, s22, s1y
+    else:
+        xp, xo, mp, mo, spp, soo, spy = x2, x1, m2, m1, s22, s11, s2y
+    k = s12 / spp if spp > 0 else 0.0
+    # Orthogonalize twice: the second pass removes what rounding in k and in
+    # the means left of p and of the intercept in the residual
+    sr = srp = 0.0
+    for i in range(n):
+        r = (xo[i] - mo) - k * (xp[i] - mp)
+        sr += r
+        srp += r * (xp[i] - mp)
+    mr = sr / n
+    k2 = srp / spp if spp > 0 else 0.0
+    srr = sry = 0.0
+    for i in range(n):
+        dp = xp[i] - mp
+        r = (xo[i] - mo) - k * dp - mr - k2 * dp
+        srr += r * r
+        sry += r * (y[i] - my)
+    return r2_from_moments(spp, spy, soo, srr, sry, syy)
+
+def r2_2pred_segments(seg: np.ndarray, n_seg: int, y: np.ndarray, x1: np.ndarray, x2: np.ndarray) -> np.ndarray:
+    """ols_r2_2pred for many independent regressions at once: row i belongs to
+    segment seg[i]. The same sweeps as the loop version, as bincount sums.
+    """
+    def _sum(w):
+        return np.bincount(seg, weights=w, minlength=n_seg)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cnt = _sum(None)
+        yc = y - (_sum(y) / cnt)[seg]
+        c1 = x1 - (_sum(x1) / cnt)[seg]
+        c2 = x2 - (_sum(x2) / cnt)[seg]
+        s11, s22, s12 = _sum(c1 * c1), _sum(c2 * c2), _sum(c1 * c2)
+        s1y, s2y, syy = _sum(c1 * yc), _sum(c2 * yc), _sum(yc * yc)
+        first = s11 >= s22
+        spp = np.where(first, s11, s22)
+        soo = np.where(first, s22, s11)
+        spy = np.where(first, s1y, s2y)
+        k = np.where(spp > 0, s12 / spp, 0.0)
+        on_first = first[seg]
+        cp = np.where(on_first, c1, c2)
+        r = np.where(on_first, c2, c1) - k[seg] * cp
+        # Second orthogonalization pass, as in the loop version
+        k2 = np.where(spp > 0, _sum(r * cp) / spp, 0.0)
+        r = r - (_sum(r) / cnt)[seg] - k2[seg] * cp
+        srr, sry = _sum(r * r), _sum(r * yc)
+    return np.fromiter(
+        map(r2_from_moments, spp.tolist(), spy.tolist(), soo.tolist(), srr.tolist(), sry.tolist(), syy.tolist()),
+        dtype=np.float64, count=n_seg,
+    )
+
+def _ols_r2_2pred_numpy(y, x1, x2):
+    return float(r2_2pred_segments(np.zeros(len(y), dtype=np.intp), 1, y, x1, x2)[0])
+
+# Compiled lazily on first call and cached to __pycache__ across runs. No
+# fastmath anywhere: it would let the compiler drop the degenerate/finite checks.
+if njit is not None:
+    r2_from_moments = njit(cache=True)(_r2_from_moments)
+    ols_r2_2pred = njit(cache=True)(_ols_r2_2pred_loops)
+else:
+    r2_from_moments = _r2_from_moments
+    ols_r2_2pred = _ols_r2_2pred_numpy
+
+def ols_r2(y: np.ndarray, X: np.ndarray) -> float:
+    X = np.asarray(X, dtype=float).reshape(len(y), -1)
+    if X.shape[1] == 2 and len(y) > 0:
+        return float(ols_r2_2pred(
+            np.ascontiguousarray(y, dtype=np.float64),
+            np.ascontiguousarray(X[:, 0]),
+            np.ascontiguousarray(X[:, 1]),
+        ))
+    # Other predictor counts: normal equations on centered data; the intercept drops out of the system
+    yc = y - y.mean()
+    Xc = X - X.mean(axis=0)
+    ss_tot = float(yc @ yc)
     if ss_tot <= 0:
         return 0.0
-    r2 = 1.0 - (ss_res / ss_tot)
+    XtX = Xc.T @ Xc
+    Xty = Xc.T @ yc
+    try:
+        beta = np.linalg.solve(XtX, Xty)
+    except np.linalg.LinAlgError:
+        # Singular (e.g. constant or collinear predictors): min-norm solution of the small system
+        beta = np.linalg.lstsq(XtX, Xty, rcond=None)[0]
+    r2 = float(beta @ Xty) / ss_tot
     # Guard against numerical issues
     if not np.isfinite(r2):
         return 0.0